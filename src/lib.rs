@@ -1,9 +1,12 @@
 
 #[cfg(test)]
 mod tests {
-    use arrow_array::{PrimitiveArray, StringArray};
-    use arrow_array::types::{Int32Type, Int8Type, UInt16Type};
+    use std::sync::Arc;
+
+    use arrow_array::{Array, ArrayRef, PrimitiveArray, RecordBatch, StringArray};
+    use arrow_array::types::{Int32Type, Int8Type, TimestampNanosecondType, UInt16Type};
     use arrow_buffer::BooleanBuffer;
+    use arrow_schema::{DataType, Field, TimeUnit};
 
     #[test]
     fn primitive_array() {
@@ -98,4 +101,76 @@ mod tests {
         println!("{:?}", array);
     }
 
+    #[test]
+    fn record_batch() {
+        let ids: ArrayRef = Arc::new(PrimitiveArray::<Int32Type>::from(vec![Some(1), None, Some(3)]));
+        let names: ArrayRef = Arc::new(StringArray::from(vec![Some("a"), Some("b"), None]));
+        let batch = RecordBatch::try_from_iter(vec![("id", ids.clone()), ("name", names.clone())]).unwrap();
+
+        // set debugger breakpoint here
+        // go to lldb console and type:
+        // command script import <repo dir>/src/lldb/lldb_lookup.py
+        //
+        // then type:
+        // arrow mem
+        //
+        // `ids` and `names` are the same arrays as the batch columns so they are counted once in the total
+        //
+        // or to see the rows:
+        // arrow table batch --rows 0..3
+
+        println!("{:?} {:?} {:?}", batch, ids, names);
+    }
+
+    #[test]
+    fn watch_primitive_array() {
+        let mut array = PrimitiveArray::<Int32Type>::from(vec![Some(1), Some(2), None, Some(4)]);
+
+        for i in 0..3 {
+            // set debugger breakpoint here
+            // go to lldb console and type:
+            // command script import <repo dir>/src/lldb/lldb_lookup.py
+            //
+            // then type (only on the first stop):
+            // arrow watch array
+            //
+            // and continue, every stop will print the changed ranges
+            println!("{:?}", array);
+
+            array = array.unary::<_, Int32Type>(|value| value * (i + 2));
+        }
+    }
+
+    #[test]
+    fn ffi_array() {
+        let array = PrimitiveArray::<Int32Type>::from(vec![Some(1), None, Some(3)]);
+        let (ffi_array, ffi_schema) = arrow_array::ffi::to_ffi(&array.to_data()).unwrap();
+
+        // set debugger breakpoint here
+        // go to lldb console and type:
+        // command script import <repo dir>/src/lldb/lldb_lookup.py
+        //
+        // then type:
+        // arrow ffi ffi_array ffi_schema
+
+        println!("{:?} {:?}", ffi_array.len(), ffi_schema.format());
+    }
+
+    #[test]
+    fn data_type() {
+        let data_type = DataType::Dictionary(Box::new(DataType::Int8), Box::new(DataType::Timestamp(TimeUnit::Nanosecond, Some("UTC".into()))));
+        let field = Field::new("list", DataType::List(Arc::new(Field::new("item", DataType::Decimal128(10, 2), true))), false);
+        let array = PrimitiveArray::<TimestampNanosecondType>::from(vec![Some(1), None]).with_timezone("UTC");
+
+        // set debugger breakpoint here
+        // go to lldb console and type:
+        // command script import <repo dir>/src/lldb/lldb_lookup.py
+        //
+        // then type:
+        // p data_type
+        // p field
+        // p array
+
+        println!("{:?} {:?} {:?}", data_type, field, array);
+    }
 }
@@ -0,0 +1,28 @@
+import shlex
+
+from arrow_ffi import ffi_command
+from arrow_memory import memory_command
+from arrow_table import table_command
+from arrow_watch import watch_command
+
+# Need to also document in the README
+SUBCOMMANDS = {
+    "mem": memory_command,
+    "ffi": ffi_command,
+    "table": table_command,
+    "watch": watch_command,
+}
+
+
+def arrow_command(debugger, command, exe_ctx, result, internal_dict):
+    """Entry point of the `arrow` LLDB command, dispatches to the subcommand"""
+    args = shlex.split(command)
+
+    if len(args) == 0 or args[0] not in SUBCOMMANDS:
+        result.SetError("usage: arrow <%s> [args...]" % "|".join(SUBCOMMANDS))
+        return
+
+    try:
+        SUBCOMMANDS[args[0]](debugger, args[1:], exe_ctx, result)
+    except Exception as e:
+        result.SetError("arrow %s: %s" % (args[0], e))
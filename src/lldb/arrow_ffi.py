@@ -0,0 +1,415 @@
+import decimal
+import struct
+
+import lldb
+
+from lldb_providers import (
+    StopCache,
+    bitmap_to_list,
+    find_value,
+    format_arrow_value,
+    parse_row_range,
+    read_bitmap,
+    read_byte_values,
+    read_process_memory,
+    read_string_values,
+    unpack_values,
+)
+
+# Decoder for the Arrow C Data Interface structs
+# https://arrow.apache.org/docs/format/CDataInterface.html
+#
+# struct ArrowSchema {
+#   const char* format;
+#   const char* name;
+#   const char* metadata;
+#   int64_t flags;
+#   int64_t n_children;
+#   struct ArrowSchema** children;
+#   struct ArrowSchema* dictionary;
+#   void (*release)(struct ArrowSchema*);
+#   void* private_data;
+# };
+#
+# struct ArrowArray {
+#   int64_t length;
+#   int64_t null_count;
+#   int64_t offset;
+#   int64_t n_buffers;
+#   int64_t n_children;
+#   const void** buffers;
+#   struct ArrowArray** children;
+#   struct ArrowArray* dictionary;
+#   void (*release)(struct ArrowArray*);
+#   void* private_data;
+# };
+#
+# The layout is fixed, so unlike the other providers there is no need for debug info,
+# each struct is read with a single memory read.
+# Only 64 bit targets are supported, so there is no padding between the pointers and the int64_t fields
+
+# Q for the pointers, q for the int64_t fields
+SCHEMA_FORMAT = "QQQqqQQQQ"
+ARRAY_FORMAT = "qqqqqQQQQQ"
+
+DECIMAL256_MAX_PRECISION = 76
+
+ARROW_FLAG_DICTIONARY_ORDERED = 1
+ARROW_FLAG_NULLABLE = 2
+
+# Format string -> (data type name, struct format)
+PRIMITIVE_FORMATS = {
+    "c": ("Int8", "b"),
+    "C": ("UInt8", "B"),
+    "s": ("Int16", "h"),
+    "S": ("UInt16", "H"),
+    "i": ("Int32", "i"),
+    "I": ("UInt32", "I"),
+    "l": ("Int64", "q"),
+    "L": ("UInt64", "Q"),
+    "e": ("Float16", "e"),
+    "f": ("Float32", "f"),
+    "g": ("Float64", "d"),
+    "tdD": ("Date32", "i"),
+    "tdm": ("Date64", "q"),
+    "tts": ("Time32(Second)", "i"),
+    "ttm": ("Time32(Millisecond)", "i"),
+    "ttu": ("Time64(Microsecond)", "q"),
+    "ttn": ("Time64(Nanosecond)", "q"),
+    "tDs": ("Duration(Second)", "q"),
+    "tDm": ("Duration(Millisecond)", "q"),
+    "tDu": ("Duration(Microsecond)", "q"),
+    "tDn": ("Duration(Nanosecond)", "q"),
+    "tiM": ("Interval(YearMonth)", "i"),
+}
+
+TIME_UNITS = {"s": "Second", "m": "Millisecond", "u": "Microsecond", "n": "Nanosecond"}
+
+# Format string -> (data type name, offset struct format)
+BINARY_FORMATS = {
+    "u": ("Utf8", "i"),
+    "U": ("LargeUtf8", "q"),
+    "z": ("Binary", "i"),
+    "Z": ("LargeBinary", "q"),
+}
+
+LIST_FORMATS = {
+    "+l": ("List", "i"),
+    "+L": ("LargeList", "q"),
+}
+
+
+class FFIArrowSchema:
+    def __init__(self, address, format, name, flags, children, dictionary):
+        # type: (int, str, str, int, list, FFIArrowSchema) -> FFIArrowSchema
+        self.address = address
+        self.format = format
+        self.name = name
+        self.flags = flags
+        self.children = children
+        self.dictionary = dictionary
+
+    def is_nullable(self):
+        return self.flags & ARROW_FLAG_NULLABLE != 0
+
+    def data_type(self):
+        # type: () -> str
+        """Returns the data type in the same form as arrow-rs `DataType` debug output"""
+        if self.dictionary is not None:
+            return "Dictionary(%s, %s)" % (self._own_data_type(), self.dictionary.data_type())
+        return self._own_data_type()
+
+    def _own_data_type(self):
+        # type: () -> str
+        fmt = self.format
+
+        if fmt == "n":
+            return "Null"
+        if fmt == "b":
+            return "Boolean"
+        if fmt in PRIMITIVE_FORMATS:
+            return PRIMITIVE_FORMATS[fmt][0]
+        if fmt in BINARY_FORMATS:
+            return BINARY_FORMATS[fmt][0]
+        if fmt.startswith("ts") and len(fmt) >= 4 and fmt[3] == ":":
+            timezone = fmt[4:]
+            return "Timestamp(%s, %s)" % (TIME_UNITS[fmt[2]], 'Some("%s")' % timezone if timezone else "None")
+        if fmt.startswith("w:"):
+            return "FixedSizeBinary(%s)" % fmt[2:]
+        if fmt.startswith("d:"):
+            precision, scale, bit_width = parse_decimal_format(fmt)
+            return "Decimal%d(%d, %d)" % (bit_width, precision, scale)
+        if fmt in LIST_FORMATS:
+            return "%s(%s)" % (LIST_FORMATS[fmt][0], self.children[0].describe())
+        if fmt.startswith("+w:"):
+            return "FixedSizeList(%s, %s)" % (self.children[0].describe(), fmt[3:])
+        if fmt == "+s":
+            return "Struct(%s)" % ", ".join(child.describe() for child in self.children)
+        if fmt == "+m":
+            return "Map(%s)" % self.children[0].describe()
+
+        return "Unsupported(%s)" % fmt
+
+    def describe(self):
+        # type: () -> str
+        return '"%s": %s%s' % (self.name, self.data_type(), "" if self.is_nullable() else " not null")
+
+
+class FFIArrowArray:
+    def __init__(self, address, length, null_count, offset, buffers, children, dictionary):
+        # type: (int, int, int, int, list, list, FFIArrowArray) -> FFIArrowArray
+        self.address = address
+        self.length = length
+        self.null_count = null_count
+        self.offset = offset
+        self.buffers = buffers
+        self.children = children
+        self.dictionary = dictionary
+
+
+def parse_decimal_format(fmt):
+    # type: (str) -> tuple
+    # d:precision,scale[,bitWidth]
+    parts = fmt[2:].split(",")
+    bit_width = int(parts[2]) if len(parts) > 2 else 128
+    return int(parts[0]), int(parts[1]), bit_width
+
+
+def read_pointers(process, address, count):
+    # type: (SBProcess, int, int) -> list
+    if count == 0 or address == 0:
+        return []
+
+    # Only called with addresses read by `read_struct`, which already checked for a 64 bit target
+    return unpack_values(process, "Q", read_process_memory(process, address, count * 8))
+
+
+def read_struct(process, address, fmt):
+    # type: (SBProcess, int, str) -> tuple
+    if process.GetAddressByteSize() != 8:
+        raise RuntimeError("The C Data Interface structs are only supported on 64 bit targets")
+
+    byte_order = "<" if process.GetByteOrder() == lldb.eByteOrderLittle else ">"
+    return struct.unpack(byte_order + fmt, read_process_memory(process, address, struct.calcsize(byte_order + fmt)))
+
+
+def read_c_string(process, address):
+    # type: (SBProcess, int) -> str
+    if address == 0:
+        return ""
+
+    error = lldb.SBError()
+    value = process.ReadCStringFromMemory(address, 4096, error)
+    if not error.Success():
+        raise RuntimeError("Failed to read string at 0x%x: %s" % (address, error.GetCString()))
+
+    return value
+
+
+# schema address -> FFIArrowSchema
+_schema_cache = StopCache()
+
+
+def read_schema(process, address):
+    # type: (SBProcess, int) -> FFIArrowSchema
+    cached = _schema_cache.get(process, address)
+    if cached is not None:
+        return cached
+
+    format_ptr, name_ptr, _metadata, flags, n_children, children_ptr, dictionary_ptr, release, _private_data = read_struct(
+        process, address, SCHEMA_FORMAT
+    )
+    if release == 0:
+        raise RuntimeError("FFI_ArrowSchema at 0x%x was released" % address)
+
+    schema = FFIArrowSchema(
+        address=address,
+        format=read_c_string(process, format_ptr),
+        name=read_c_string(process, name_ptr),
+        flags=flags,
+        children=[read_schema(process, child) for child in read_pointers(process, children_ptr, n_children)],
+        dictionary=read_schema(process, dictionary_ptr) if dictionary_ptr != 0 else None,
+    )
+    _schema_cache.set(address, schema)
+
+    return schema
+
+
+def read_array(process, address):
+    # type: (SBProcess, int) -> FFIArrowArray
+    length, null_count, offset, n_buffers, n_children, buffers_ptr, children_ptr, dictionary_ptr, release, _private_data = read_struct(
+        process, address, ARRAY_FORMAT
+    )
+    if release == 0:
+        raise RuntimeError("FFI_ArrowArray at 0x%x was released" % address)
+
+    return FFIArrowArray(
+        address=address,
+        length=length,
+        null_count=null_count,
+        offset=offset,
+        buffers=read_pointers(process, buffers_ptr, n_buffers),
+        children=[read_array(process, child) for child in read_pointers(process, children_ptr, n_children)],
+        dictionary=read_array(process, dictionary_ptr) if dictionary_ptr != 0 else None,
+    )
+
+
+def read_validity(process, array, start, end):
+    # type: (SBProcess, FFIArrowArray, int, int) -> list
+    """Returns the validity of [start, end) or None when all the values are valid"""
+    if array.null_count == 0 or len(array.buffers) == 0 or array.buffers[0] == 0:
+        return None
+
+    return bitmap_to_list(read_bitmap(process, array.buffers[0], array.offset + start, end - start), end - start)
+
+
+def decode_array(process, array, schema, start, end):
+    # type: (SBProcess, FFIArrowArray, FFIArrowSchema, int, int) -> list
+    """Decode the values in [start, end) of the array, nulls are None"""
+    end = min(end, array.length)
+    if start >= end:
+        return []
+
+    values = decode_values(process, array, schema, start, end)
+    validity = read_validity(process, array, start, end)
+    if validity is None:
+        validity = [True] * len(values)
+
+    if schema.dictionary is not None:
+        # The keys of null slots can be anything, so only the range of the valid keys is decoded
+        valid_keys = [key for key, is_valid in zip(values, validity) if is_valid]
+        if len(valid_keys) == 0:
+            return [None] * len(values)
+
+        first_key = min(valid_keys)
+        dictionary_values = decode_array(process, array.dictionary, schema.dictionary, first_key, max(valid_keys) + 1)
+        values = [dictionary_values[key - first_key] if is_valid else None for key, is_valid in zip(values, validity)]
+
+    return [value if is_valid else None for value, is_valid in zip(values, validity)]
+
+
+def decode_values(process, array, schema, start, end):
+    # type: (SBProcess, FFIArrowArray, FFIArrowSchema, int, int) -> list
+    """Decode the values in [start, end) ignoring the validity"""
+    fmt = schema.format
+    start += array.offset
+    end += array.offset
+
+    if fmt == "n":
+        return [None] * (end - start)
+
+    if fmt == "b":
+        return bitmap_to_list(read_bitmap(process, array.buffers[1], start, end - start), end - start)
+
+    if fmt in PRIMITIVE_FORMATS or fmt.startswith("ts"):
+        struct_format = PRIMITIVE_FORMATS[fmt][1] if fmt in PRIMITIVE_FORMATS else "q"
+        return read_primitive_values(process, array.buffers[1], struct_format, start, end)
+
+    if fmt in BINARY_FORMATS:
+        reader = read_string_values if fmt in ("u", "U") else read_byte_values
+        return reader(process, array.buffers[1], BINARY_FORMATS[fmt][1], array.buffers[2], start, end)
+
+    if fmt.startswith("w:"):
+        width = int(fmt[2:])
+        data = read_process_memory(process, array.buffers[1] + start * width, (end - start) * width)
+        return [data[i * width:(i + 1) * width] for i in range(end - start)]
+
+    if fmt.startswith("d:"):
+        precision, scale, bit_width = parse_decimal_format(fmt)
+        width = bit_width // 8
+        data = read_process_memory(process, array.buffers[1] + start * width, (end - start) * width)
+        byte_order = "little" if process.GetByteOrder() == lldb.eByteOrderLittle else "big"
+        # The default context (28 digits) would round decimal128/256 values
+        context = decimal.Context(prec=max(precision, DECIMAL256_MAX_PRECISION))
+        return [
+            decimal.Decimal(int.from_bytes(data[i * width:(i + 1) * width], byte_order, signed=True)).scaleb(-scale, context)
+            for i in range(end - start)
+        ]
+
+    if fmt in LIST_FORMATS or fmt == "+m":
+        # A map is a list of the entries struct
+        offset_format = LIST_FORMATS[fmt][1] if fmt in LIST_FORMATS else "i"
+        offsets = read_primitive_values(process, array.buffers[1], offset_format, start, end + 1)
+        child_values = decode_array(process, array.children[0], schema.children[0], offsets[0], offsets[-1])
+        return [child_values[offsets[i] - offsets[0]:offsets[i + 1] - offsets[0]] for i in range(end - start)]
+
+    if fmt.startswith("+w:"):
+        size = int(fmt[3:])
+        child_values = decode_array(process, array.children[0], schema.children[0], start * size, end * size)
+        return [child_values[i * size:(i + 1) * size] for i in range(end - start)]
+
+    if fmt == "+s":
+        columns = [
+            decode_array(process, child, child_schema, start, end)
+            for child, child_schema in zip(array.children, schema.children)
+        ]
+        return [
+            dict((child_schema.name, column[i]) for child_schema, column in zip(schema.children, columns))
+            for i in range(end - start)
+        ]
+
+    raise RuntimeError("Decoding %s is not supported" % schema.data_type())
+
+
+def read_primitive_values(process, address, struct_format, start, end):
+    # type: (SBProcess, int, str, int, int) -> list
+    size = struct.calcsize(struct_format)
+    return unpack_values(process, struct_format, read_process_memory(process, address + start * size, (end - start) * size))
+
+
+def get_struct_address(valobj):
+    # type: (SBValue) -> int
+    """Accept both the struct itself and pointers to it"""
+    while valobj.GetType().IsPointerType() or valobj.GetType().IsReferenceType():
+        if valobj.GetType().GetPointeeType().IsPointerType():
+            valobj = valobj.Dereference()
+            continue
+        return valobj.GetValueAsUnsigned()
+
+    return valobj.GetLoadAddress()
+
+
+def FFIArrowSchemaSummaryProvider(valobj, dict):
+    # type: (SBValue, dict) -> str
+    try:
+        return read_schema(valobj.GetProcess(), get_struct_address(valobj)).describe()
+    except Exception as e:
+        return "<%s>" % e
+
+
+def ffi_command(debugger, args, exe_ctx, result):
+    """arrow ffi <array-expr> <schema-expr> [--rows a..b]
+
+    Decode an array exported through the Arrow C Data Interface, no debug info is needed for the array type
+    """
+    usage = "usage: arrow ffi <array-expr> <schema-expr> [--rows a..b]"
+
+    rows = None
+    if "--rows" in args:
+        index = args.index("--rows")
+        if index + 1 >= len(args):
+            result.SetError(usage)
+            return
+        rows = args[index + 1]
+        args = args[:index] + args[index + 2:]
+
+    if len(args) != 2:
+        result.SetError(usage)
+        return
+
+    frame = exe_ctx.GetFrame()
+    if not frame.IsValid():
+        result.SetError("No selected frame")
+        return
+
+    process = exe_ctx.GetProcess()
+    array = read_array(process, get_struct_address(find_value(frame, args[0])))
+    schema = read_schema(process, get_struct_address(find_value(frame, args[1])))
+
+    start, end = parse_row_range(rows or "..", array.length)
+
+    lines = ["%s length=%d null_count=%d" % (schema.describe(), array.length, array.null_count)]
+    for i, value in enumerate(decode_array(process, array, schema, start, end)):
+        lines.append("  [%d] = %s" % (start + i, format_arrow_value(value)))
+
+    result.AppendMessage("\n".join(lines))
@@ -0,0 +1,247 @@
+import lldb
+
+from lldb_providers import (
+    find_value,
+    read_usize,
+    read_vec_elements,
+    resolve_array_ref,
+    select_enum_variant,
+    unwrap_unique_or_non_null,
+)
+from arrow_types import ARRAY_REF_REGEX, BUFFER_REGEX
+
+# Types that can't hold arrow buffers, no need to walk their fields
+SKIPPED_TYPE_PREFIXES = (
+    "arrow_schema::",
+    "alloc::sync::Arc<arrow_schema::",
+    "core::marker::PhantomData<",
+    "core::sync::atomic::",
+)
+
+# Arrays can be nested (e.g. StructArray -> ArrayRef -> ListArray -> ...), this is just a safety net
+MAX_WALK_DEPTH = 32
+
+
+def format_bytes(size):
+    # type: (int) -> str
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return ("%d %s" % (size, unit)) if unit == "B" else ("%.1f %s" % (size, unit))
+        size /= 1024.0
+
+
+class BufferInfo:
+    """A single `arrow_buffer::Buffer`, a slice of an allocation (`Bytes`) that can be shared"""
+
+    def __init__(self, address, length, allocation_address, capacity, strong_count):
+        # type: (int, int, int, int, int) -> BufferInfo
+        self.address = address
+        self.length = length
+        self.allocation_address = allocation_address
+        self.capacity = capacity
+        self.strong_count = strong_count
+
+
+class MemoryReport:
+    """Accumulate buffers, deduplicating slices by data pointer, allocations by their `Bytes` pointer
+    and arrays by their address
+    """
+
+    def __init__(self):
+        self.slices = set()
+        self.allocations = {}
+        self.arrays = set()
+
+    def add_buffer(self, buffer):
+        # type: (BufferInfo) -> None
+        self.slices.add((buffer.address, buffer.length))
+        self.allocations[buffer.allocation_address] = buffer
+
+    def merge(self, other):
+        # type: (MemoryReport) -> None
+        self.slices.update(other.slices)
+        self.allocations.update(other.allocations)
+        self.arrays.update(other.arrays)
+
+    def array_count(self):
+        return len(self.arrays)
+
+    def buffer_count(self):
+        return len(self.allocations)
+
+    def logical_bytes(self):
+        return sum(length for _, length in self.slices)
+
+    def allocated_bytes(self):
+        return sum(buffer.capacity for buffer in self.allocations.values())
+
+    def shared_buffers(self):
+        return [buffer for buffer in self.allocations.values() if buffer.strong_count > 1]
+
+
+def read_buffer(buffer):
+    # type: (SBValue) -> BufferInfo
+    """Parse arrow_buffer::buffer::immutable::Buffer
+
+    struct Buffer { data: Arc<Bytes>, ptr: *const u8, length: usize }
+    struct Bytes { ptr: NonNull<u8>, len: usize, deallocation: Deallocation }
+    """
+    arc_inner_ptr = unwrap_unique_or_non_null(buffer.GetChildMemberWithName("data").GetChildMemberWithName("ptr"))
+    arc_inner_address = arc_inner_ptr.GetValueAsUnsigned()
+    if arc_inner_address == 0:
+        return None
+
+    # ArcInner is #[repr(C)] { strong, weak, data }, the strong count is the first usize
+    strong_count = read_usize(buffer.GetProcess(), arc_inner_address)
+
+    bytes_value = arc_inner_ptr.Dereference().GetChildMemberWithName("data")
+    allocation_address = unwrap_unique_or_non_null(bytes_value.GetChildMemberWithName("ptr")).GetValueAsUnsigned()
+    allocation_length = bytes_value.GetChildMemberWithName("len").GetValueAsUnsigned()
+
+    return BufferInfo(
+        address=buffer.GetChildMemberWithName("ptr").GetValueAsUnsigned(),
+        length=buffer.GetChildMemberWithName("length").GetValueAsUnsigned(),
+        allocation_address=allocation_address,
+        capacity=get_deallocation_capacity(bytes_value.GetChildMemberWithName("deallocation"), allocation_length),
+        strong_count=strong_count,
+    )
+
+
+def get_deallocation_capacity(deallocation, default):
+    # type: (SBValue, int) -> int
+    """Get the allocated size out of
+
+    enum Deallocation { Standard(Layout), Custom(Arc<dyn Allocation>, usize) }
+    """
+    variant = select_enum_variant(deallocation)
+
+    size = variant.GetChildAtIndex(0).GetChildMemberWithName("size")
+    if size.IsValid():
+        return size.GetValueAsUnsigned()
+
+    capacity = variant.GetChildAtIndex(1)
+    if capacity.IsValid() and capacity.GetNumChildren() == 0:
+        return capacity.GetValueAsUnsigned()
+
+    return default
+
+
+class BufferCollector:
+    """Walk values looking for arrow buffers, resolving `ArrayRef`s through their vtable"""
+
+    def __init__(self):
+        # (address, type name) of every value already walked, so values reachable twice are counted once
+        self.visited = set()
+
+    def collect(self, valobj, report):
+        # type: (SBValue, MemoryReport) -> None
+        while valobj.GetType().IsPointerType() or valobj.GetType().IsReferenceType():
+            valobj = valobj.Dereference()
+
+        self._walk(valobj, report, 0)
+
+    def _walk(self, valobj, report, depth):
+        # type: (SBValue, MemoryReport, int) -> None
+        if depth > MAX_WALK_DEPTH or not valobj.IsValid():
+            return
+
+        # We don't want the children of our own synthetic providers (the array elements)
+        valobj = valobj.GetNonSyntheticValue()
+        type_name = valobj.GetType().GetName()
+
+        key = (valobj.GetLoadAddress(), type_name)
+        if key[0] != lldb.LLDB_INVALID_ADDRESS:
+            if key in self.visited:
+                return
+            self.visited.add(key)
+
+        if BUFFER_REGEX.match(type_name):
+            buffer = read_buffer(valobj)
+            if buffer is not None:
+                report.add_buffer(buffer)
+            return
+
+        if ARRAY_REF_REGEX.match(type_name):
+            array = resolve_array_ref(valobj)
+            if array is not None:
+                self._walk(array, report, depth + 1)
+            return
+
+        if type_name.startswith(SKIPPED_TYPE_PREFIXES) or valobj.GetType().IsPointerType():
+            return
+
+        if type_name.startswith("alloc::vec::Vec<"):
+            # Vecs of primitives (e.g. `Vec<u8>`) can't hold buffers, don't create a value per element
+            if valobj.GetType().GetTemplateArgumentType(0).GetNumberOfFields() == 0:
+                return
+
+            try:
+                elements = read_vec_elements(valobj)
+            except RuntimeError:
+                return
+
+            for element in elements:
+                self._walk(element, report, depth + 1)
+            return
+
+        if type_name.startswith("arrow_array::") and ("Array<" in type_name or type_name.endswith("Array")):
+            report.arrays.add(key)
+
+        valobj = select_enum_variant(valobj)
+        for i in range(valobj.GetNumChildren()):
+            self._walk(valobj.GetChildAtIndex(i), report, depth + 1)
+
+
+def is_arrow_value(valobj):
+    # type: (SBValue) -> bool
+    type_name = valobj.GetType().GetName()
+    return "arrow_array::" in type_name or "arrow_buffer::" in type_name
+
+
+def memory_command(debugger, args, exe_ctx, result):
+    """arrow mem [<expr>]
+
+    Report logical bytes vs allocated capacity vs shared buffers of all arrow values in the
+    current frame (or of the given expression)
+    """
+    frame = exe_ctx.GetFrame()
+    if not frame.IsValid():
+        result.SetError("No selected frame")
+        return
+
+    if args:
+        roots = [find_value(frame, " ".join(args))]
+    else:
+        variables = frame.GetVariables(True, True, False, True)
+        roots = [variables.GetValueAtIndex(i) for i in range(variables.GetSize())]
+        roots = [value for value in roots if is_arrow_value(value)]
+
+    total = MemoryReport()
+    rows = []
+
+    for root in roots:
+        report = MemoryReport()
+        BufferCollector().collect(root, report)
+        total.merge(report)
+
+        rows.append((root.GetName() or "<expr>", report))
+
+    lines = ["%-32s %8s %8s %12s %12s %8s" % ("value", "arrays", "buffers", "logical", "allocated", "shared")]
+    for name, report in rows + [("total (deduplicated)", total)]:
+        lines.append("%-32s %8d %8d %12s %12s %8d" % (
+            name,
+            report.array_count(),
+            report.buffer_count(),
+            format_bytes(report.logical_bytes()),
+            format_bytes(report.allocated_bytes()),
+            len(report.shared_buffers()),
+        ))
+
+    shared = total.shared_buffers()
+    if shared:
+        lines.append("")
+        lines.append("shared buffers:")
+        for buffer in sorted(shared, key=lambda b: -b.capacity):
+            lines.append("  0x%x  %12s  strong=%d" % (buffer.allocation_address, format_bytes(buffer.capacity), buffer.strong_count))
+
+    result.AppendMessage("\n".join(lines))
@@ -0,0 +1,242 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from lldb_providers import (
+    ArrowPrimitiveArraySyntheticProvider,
+    ArrowStringArraySyntheticProvider,
+    BooleanBufferParser,
+    NullBufferParser,
+    bitmap_to_list,
+    find_value,
+    format_arrow_value,
+    parse_row_range,
+    read_bitmap,
+    read_process_memory,
+    read_string_values,
+    read_vec_elements,
+    resolve_array_ref,
+    struct_format_for_type,
+    unpack_values,
+)
+from arrow_types import BOOLEAN_ARRAY_REGEX, RECORD_BATCH_REGEX, ArrowType, classify_struct
+from enum_layouts import MAX_ELEMENTS, OpaqueValue, RustStructValue, decode_value
+
+DEFAULT_ROWS = 20
+DEFAULT_CELL_WIDTH = 20
+MAX_WORKERS = 8
+
+UNSUPPORTED_CELL = OpaqueValue("<unsupported>")
+
+
+def get_validity_location(null_buffer_parser):
+    # type: (NullBufferParser) -> tuple
+    """Returns the (address, bit offset) of the validity bitmap, or None when there are no nulls"""
+    if not null_buffer_parser.has_nulls():
+        return None
+
+    boolean_buffer_parser = null_buffer_parser.boolean_buffer_parser
+    return boolean_buffer_parser.data_ptr.GetValueAsUnsigned(), boolean_buffer_parser.offset
+
+
+class ColumnReader:
+    """Decode a window of a single column
+
+    Everything is read out of the SBValues up front (addresses and formats), so `read` only does
+    memory reads and can run on a worker thread
+    """
+
+    def __init__(self, process, validity, read_values):
+        # type: (SBProcess, tuple, Callable[[int, int], list]) -> ColumnReader
+        self.process = process
+        self.validity = validity
+        self.read_values = read_values
+
+    def read(self, start, end):
+        # type: (int, int) -> list
+        values = self.read_values(start, end)
+        if self.validity is None:
+            return values
+
+        address, offset = self.validity
+        validity = bitmap_to_list(read_bitmap(self.process, address, offset + start, end - start), end - start)
+        return [value if is_valid else None for value, is_valid in zip(values, validity)]
+
+
+def create_column_reader(array):
+    # type: (SBValue) -> ColumnReader
+    """Returns None when the array type is not supported"""
+    array = array.GetNonSyntheticValue()
+    process = array.GetProcess()
+    type_name = array.GetType().GetName()
+    arrow_type = classify_struct(type_name, array.GetType().fields)
+
+    if arrow_type == ArrowType.PRIMITIVE_ARRAY:
+        provider = ArrowPrimitiveArraySyntheticProvider(array, {})
+        values_parser = provider.scalar_buffer_parser
+        fmt = values_parser.get_struct_format()
+        if fmt is None:
+            return None
+
+        address = values_parser.data_ptr.GetValueAsUnsigned()
+        size = values_parser.element_type_size
+
+        return ColumnReader(
+            process,
+            get_validity_location(provider.null_buffer_parser),
+            lambda start, end: unpack_values(process, fmt, read_process_memory(process, address + start * size, (end - start) * size)),
+        )
+
+    if arrow_type == ArrowType.STRING_ARRAY:
+        provider = ArrowStringArraySyntheticProvider(array, {})
+        offsets_address = provider.offset_buffer_parser.parser.data_ptr.GetValueAsUnsigned()
+        offset_fmt = struct_format_for_type(provider.offset_type)
+        data_address = provider.data_ptr.GetValueAsUnsigned()
+
+        return ColumnReader(
+            process,
+            get_validity_location(provider.null_buffer_parser),
+            lambda start, end: read_string_values(process, offsets_address, offset_fmt, data_address, start, end),
+        )
+
+    if BOOLEAN_ARRAY_REGEX.match(type_name):
+        # struct BooleanArray { data_type: DataType, values: BooleanBuffer, nulls: Option<NullBuffer> }
+        values_parser = BooleanBufferParser(array.GetChildMemberWithName("values"))
+        address = values_parser.data_ptr.GetValueAsUnsigned()
+        offset = values_parser.offset
+
+        return ColumnReader(
+            process,
+            get_validity_location(NullBufferParser(array.GetChildMemberWithName("nulls"), is_option=True)),
+            lambda start, end: bitmap_to_list(read_bitmap(process, address, offset + start, end - start), end - start),
+        )
+
+    return None
+
+
+def get_column_names(batch, count):
+    # type: (SBValue, int) -> list
+    """Column names from the batch schema, falling back to the column index"""
+    names = ["column_%d" % i for i in range(count)]
+
+    try:
+        # The fields are a slice, make sure none of them are cut by the decoder element limit
+        schema = decode_value(batch.GetChildMemberWithName("schema"), max_elements=max(count, MAX_ELEMENTS))
+        # Schema { fields: Fields(Arc<[FieldRef]>), metadata }
+        fields = schema.get("fields").get("__0")
+    except Exception:
+        return names
+
+    for i, field in enumerate(fields[:count]):
+        if isinstance(field, RustStructValue) and isinstance(field.get("name"), str):
+            names[i] = field.get("name")
+
+    return names
+
+
+def select_columns(names, selection):
+    # type: (list, list) -> list
+    """Resolve the `--columns` selection (names or indices) to column indices"""
+    if len(selection) == 0:
+        return list(range(len(names)))
+
+    indices = []
+    for column in selection:
+        if column in names:
+            indices.append(names.index(column))
+        elif column.isdigit() and int(column) < len(names):
+            indices.append(int(column))
+        else:
+            raise ValueError("Unknown column '%s'" % column)
+
+    return indices
+
+
+def truncate(text, width):
+    # type: (str, int) -> str
+    if len(text) <= width:
+        return text
+    return text[:max(width - 3, 0)] + "..."
+
+
+def render_table(headers, columns, first_row, width):
+    # type: (list, list, int, int) -> str
+    headers = [truncate(header, width) for header in headers]
+    cells = [[truncate(format_arrow_value(value), width) for value in column] for column in columns]
+    row_count = len(cells[0]) if cells else 0
+
+    index_width = len(str(first_row + max(row_count - 1, 0)))
+    widths = [max([len(header)] + [len(cell) for cell in column]) for header, column in zip(headers, cells)]
+
+    lines = [
+        " | ".join([" " * index_width] + [header.ljust(column_width) for header, column_width in zip(headers, widths)]),
+        "-+-".join(["-" * index_width] + ["-" * column_width for column_width in widths]),
+    ]
+    for row in range(row_count):
+        lines.append(" | ".join(
+            [str(first_row + row).rjust(index_width)] + [column[row].ljust(column_width) for column, column_width in zip(cells, widths)]
+        ))
+
+    return "\n".join(line.rstrip() for line in lines)
+
+
+def table_command(debugger, args, exe_ctx, result):
+    """arrow table <expr> [--rows a..b] [--columns a,b,...] [--width n]
+
+    Print the rows of a RecordBatch as an aligned table, each column is decoded on a thread pool
+    """
+    usage = "usage: arrow table <expr> [--rows a..b] [--columns a,b,...] [--width n]"
+
+    options = {"--rows": None, "--columns": "", "--width": str(DEFAULT_CELL_WIDTH)}
+    expression = []
+    i = 0
+    while i < len(args):
+        if args[i] in options:
+            if i + 1 >= len(args):
+                result.SetError(usage)
+                return
+            options[args[i]] = args[i + 1]
+            i += 2
+        else:
+            expression.append(args[i])
+            i += 1
+
+    if len(expression) == 0 or not options["--width"].isdigit():
+        result.SetError(usage)
+        return
+
+    frame = exe_ctx.GetFrame()
+    if not frame.IsValid():
+        result.SetError("No selected frame")
+        return
+
+    batch = find_value(frame, " ".join(expression)).GetNonSyntheticValue()
+    while batch.GetType().IsPointerType() or batch.GetType().IsReferenceType():
+        batch = batch.Dereference()
+
+    if not RECORD_BATCH_REGEX.match(batch.GetType().GetName()):
+        result.SetError("Expected a RecordBatch, got %s" % batch.GetType().GetName())
+        return
+
+    row_count = batch.GetChildMemberWithName("row_count").GetValueAsUnsigned()
+    columns = read_vec_elements(batch.GetChildMemberWithName("columns"))
+    column_count = len(columns)
+
+    names = get_column_names(batch, column_count)
+    selected = select_columns(names, [column for column in options["--columns"].split(",") if column])
+    start, end = parse_row_range(options["--rows"] or "..%d" % DEFAULT_ROWS, row_count)
+
+    # The SBValues are only touched on this thread, the workers only read memory
+    readers = []
+    for index in selected:
+        array = resolve_array_ref(columns[index])
+        readers.append(create_column_reader(array) if array is not None else None)
+
+    def read_column(reader):
+        if reader is None:
+            return [UNSUPPORTED_CELL] * (end - start)
+        return reader.read(start, end)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(readers)))) as executor:
+        decoded = list(executor.map(read_column, readers))
+
+    result.AppendMessage("RecordBatch rows=%d columns=%d, showing rows %d..%d" % (row_count, column_count, start, end))
+    result.AppendMessage(render_table([names[index] for index in selected], decoded, start, int(options["--width"])))
@@ -8,6 +8,10 @@ class ArrowType(object):
     STRING_ARRAY = "StringArray"
     BOOLEAN_BUFFER = "BooleanBuffer"
     OFFSET_BUFFER = "OffsetBuffer"
+    FFI_ARROW_SCHEMA = "FFI_ArrowSchema"
+    DATA_TYPE = "DataType"
+    FIELD = "Field"
+    SCALAR_VALUE = "ScalarValue"
 
 
 # Need to also add in __lldb_init_module
@@ -15,14 +19,31 @@ PRIMITIVE_ARRAY_REGEX = re.compile(r"^&*(arrow_array::([a-z_]+::)+)PrimitiveArra
 STRING_ARRAY_REGEX = re.compile(r"^&*(arrow_array::([a-z_]+::)+)GenericByteArray<.+::GenericStringType<.+>>$")
 BOOLEAN_BUFFER_REGEX = re.compile(r"^&*(arrow_buffer::([a-z_]+::)+)BooleanBuffer$")
 OFFSET_BUFFER_REGEX = re.compile(r"^&*(arrow_buffer::([a-z_]+::)+)OffsetBuffer<.+>$")
+FFI_ARROW_SCHEMA_REGEX = re.compile(r"^&*(arrow_schema::([a-z_]+::)+)FFI_ArrowSchema$")
+DATA_TYPE_REGEX = re.compile(r"^&*(arrow_schema::([a-z_]+::)+)DataType$")
+FIELD_REGEX = re.compile(r"^&*(arrow_schema::([a-z_]+::)+)Field$")
+SCALAR_VALUE_REGEX = re.compile(r"^&*(datafusion_common::([a-z_]+::)+)ScalarValue$")
 
 ARROW_TYPE_TO_REGEX = {
     ArrowType.PRIMITIVE_ARRAY: PRIMITIVE_ARRAY_REGEX,
     ArrowType.STRING_ARRAY: STRING_ARRAY_REGEX,
     ArrowType.BOOLEAN_BUFFER: BOOLEAN_BUFFER_REGEX,
     ArrowType.OFFSET_BUFFER: OFFSET_BUFFER_REGEX,
+    ArrowType.FFI_ARROW_SCHEMA: FFI_ARROW_SCHEMA_REGEX,
+    ArrowType.DATA_TYPE: DATA_TYPE_REGEX,
+    ArrowType.FIELD: FIELD_REGEX,
+    ArrowType.SCALAR_VALUE: SCALAR_VALUE_REGEX,
 }
 
+# Rust enums are unions when using rust-lldb
+ENUM_TYPES = [ArrowType.DATA_TYPE, ArrowType.SCALAR_VALUE]
+
+# Not formatted by themselves, used when walking values (e.g. `arrow mem`, `arrow table`)
+BUFFER_REGEX = re.compile(r"^(arrow_buffer::([a-z_]+::)+)Buffer$")
+RECORD_BATCH_REGEX = re.compile(r"^&*(arrow_array::([a-z_]+::)+)RecordBatch$")
+BOOLEAN_ARRAY_REGEX = re.compile(r"^&*(arrow_array::([a-z_]+::)+)BooleanArray$")
+ARRAY_REF_REGEX = re.compile(r"^&*alloc::sync::Arc<dyn arrow_array::([a-z_]+::)+Array.*>$")
+
 def classify_struct(name, fields):
     if len(fields) == 0:
         return ArrowType.UNKNOWN
@@ -34,5 +55,9 @@ def classify_struct(name, fields):
     return ArrowType.UNKNOWN
 
 
-def classify_union(fields):
+def classify_union(name, fields):
+    for ty in ENUM_TYPES:
+        if ARROW_TYPE_TO_REGEX[ty].match(name):
+            return ty
+
     return ArrowType.UNKNOWN
@@ -0,0 +1,338 @@
+import hashlib
+import struct
+
+import lldb
+
+from lldb_providers import (
+    ArrowBooleanBufferSyntheticProvider,
+    ArrowOffsetBufferSyntheticProvider,
+    ArrowPrimitiveArraySyntheticProvider,
+    bitmap_to_list,
+    resolve_array_ref,
+    unpack_values,
+)
+from arrow_types import ARRAY_REF_REGEX, ArrowType, classify_struct
+
+# Number of elements covered by a single fingerprint, must be a multiple of 8 so windows
+# start on a byte boundary of the bitmaps
+WINDOW_SIZE = 4096
+
+# Number of windows read from the process in a single memory read
+WINDOWS_PER_READ = 64
+
+# Don't flood the console when a whole range changed
+MAX_REPORTED_VALUES = 8
+
+
+def fingerprint(values, validity):
+    # type: (bytes, bytes) -> bytes
+    return hashlib.blake2b(values + b"|" + validity, digest_size=8).digest()
+
+
+class ArraySnapshot:
+    """The raw values and validity bitmap of an array at a stop, with a fingerprint per window
+
+    Values are kept as raw bytes (not decoded) so only the windows whose fingerprint changed
+    need to be decoded when comparing to the next stop.
+    The old values of the changed windows are needed for the report, so a snapshot holds a full copy
+    of the values and validity buffers (e.g. ~8 MiB for 1M `i64`), the fingerprints only save decoding
+    """
+
+    def __init__(self, process, arrow_type, length, fmt, values, validity):
+        # type: (SBProcess, str, int, str, bytes, bytes) -> ArraySnapshot
+        self.process = process
+        self.arrow_type = arrow_type
+        self.length = length
+        self.fmt = fmt
+        self.values = values
+        # Empty when there are no nulls
+        self.validity = validity
+
+        # Boolean values (no format) are bit-packed like the validity
+        self.value_width = struct.calcsize(fmt) if fmt is not None else 0
+
+        self.fingerprints = [
+            fingerprint(self._window_values(start, start + WINDOW_SIZE), self._window_validity(start, start + WINDOW_SIZE))
+            for start in range(0, length, WINDOW_SIZE)
+        ]
+
+    def _window_values(self, start, end):
+        # type: (int, int) -> bytes
+        if self.fmt is None:
+            return self.values[start // 8:(end + 7) // 8]
+        return self.values[start * self.value_width:end * self.value_width]
+
+    def _window_validity(self, start, end):
+        # type: (int, int) -> bytes
+        return self.validity[start // 8:(end + 7) // 8]
+
+    def decode(self, start, end):
+        # type: (int, int) -> list
+        end = min(end, self.length)
+        if self.fmt is None:
+            values = decode_bitmap(self.values, start, end)
+        else:
+            values = unpack_values(self.process, self.fmt, self._window_values(start, end))
+
+        if len(self.validity) == 0:
+            return values
+
+        validity = decode_bitmap(self.validity, start, end)
+        return [value if is_valid else None for value, is_valid in zip(values, validity)]
+
+
+def decode_bitmap(bitmap, start, end):
+    # type: (bytes, int, int) -> list
+    bits = int.from_bytes(bitmap[start // 8:(end + 7) // 8], "little") >> (start % 8)
+    return bitmap_to_list(bits, end - start)
+
+
+def read_in_windows(read, length):
+    # type: (Callable[[int, int], bytes], int) -> bytes
+    chunk = WINDOW_SIZE * WINDOWS_PER_READ
+    return b"".join(read(start, min(start + chunk, length)) for start in range(0, length, chunk))
+
+
+def bitmap_to_bytes(bits, length):
+    # type: (int, int) -> bytes
+    return bits.to_bytes((length + 7) // 8, "little")
+
+
+def take_snapshot(valobj):
+    # type: (SBValue) -> ArraySnapshot
+    while valobj.GetType().IsPointerType() or valobj.GetType().IsReferenceType():
+        valobj = valobj.Dereference()
+
+    if ARRAY_REF_REGEX.match(valobj.GetType().GetName()):
+        array = resolve_array_ref(valobj)
+        if array is None:
+            raise RuntimeError("Could not resolve the concrete type of '%s'" % valobj.GetType().GetName())
+        valobj = array
+
+    valobj = valobj.GetNonSyntheticValue()
+    process = valobj.GetProcess()
+    arrow_type = classify_struct(valobj.GetType().GetName(), valobj.GetType().fields)
+
+    if arrow_type == ArrowType.PRIMITIVE_ARRAY:
+        provider = ArrowPrimitiveArraySyntheticProvider(valobj, {})
+        values_parser = provider.scalar_buffer_parser
+        length = values_parser.get_length()
+
+        validity = provider.null_buffer_parser.read_validity(0, length)
+        validity = b"" if validity is None else bitmap_to_bytes(validity, length)
+
+        fmt = values_parser.get_struct_format()
+        if fmt is None:
+            raise RuntimeError("Can't watch arrays of %s" % provider.element_type.GetName())
+
+        return ArraySnapshot(process, arrow_type, length, fmt, read_in_windows(values_parser.read_bytes, length), validity)
+
+    if arrow_type == ArrowType.OFFSET_BUFFER:
+        values_parser = ArrowOffsetBufferSyntheticProvider(valobj, {}).parser.parser
+        length = values_parser.get_length()
+
+        return ArraySnapshot(process, arrow_type, length, values_parser.get_struct_format(), read_in_windows(values_parser.read_bytes, length), b"")
+
+    if arrow_type == ArrowType.BOOLEAN_BUFFER:
+        parser = ArrowBooleanBufferSyntheticProvider(valobj, {}).parser
+        length = parser.get_length()
+        values = read_in_windows(lambda start, end: bitmap_to_bytes(parser.read_bitmap(start, end), end - start), length)
+
+        return ArraySnapshot(process, arrow_type, length, None, values, b"")
+
+    raise RuntimeError("Watching %s is not supported" % valobj.GetType().GetName())
+
+
+def diff_snapshots(old, new):
+    # type: (ArraySnapshot, ArraySnapshot) -> list
+    """Returns the changed ranges as a list of (start, end, old values, new values)
+
+    Windows with the same fingerprint are skipped without decoding them
+    """
+    common_length = min(old.length, new.length)
+    changed_indices = []
+
+    for window, start in enumerate(range(0, common_length, WINDOW_SIZE)):
+        end = min(start + WINDOW_SIZE, common_length)
+        # The last window might cover a different number of elements when the length changed
+        same_coverage = start + WINDOW_SIZE <= common_length or old.length == new.length
+        if same_coverage and old.fingerprints[window] == new.fingerprints[window]:
+            continue
+
+        old_values = old.decode(start, end)
+        new_values = new.decode(start, end)
+        changed_indices.extend(start + i for i in range(end - start) if old_values[i] != new_values[i])
+
+    ranges = []
+    for index in changed_indices:
+        if ranges and ranges[-1][1] == index:
+            ranges[-1][1] = index + 1
+        else:
+            ranges.append([index, index + 1])
+
+    return [(start, end, old.decode(start, end), new.decode(start, end)) for start, end in ranges]
+
+
+def format_values(values):
+    # type: (list) -> str
+    formatted = ["None" if value is None else str(value) for value in values[:MAX_REPORTED_VALUES]]
+    if len(values) > MAX_REPORTED_VALUES:
+        formatted.append("... %d more" % (len(values) - MAX_REPORTED_VALUES))
+    return "[" + ", ".join(formatted) + "]"
+
+
+class Watch:
+    def __init__(self, watch_id, expression, frame, snapshot):
+        # type: (int, str, SBFrame, ArraySnapshot) -> Watch
+        self.watch_id = watch_id
+        self.expression = expression
+        # The same variable name in another function (or another call) is an unrelated array,
+        # so the watch is tied to the frame it was created in
+        self.thread_id = frame.GetThread().GetThreadID()
+        self.frame_key = get_frame_key(frame)
+        self.snapshot = snapshot
+
+    def find_frame(self, process):
+        # type: (SBProcess) -> SBFrame
+        """The frame of the watch when it's still on the stack, None otherwise"""
+        thread = process.GetThreadByID(self.thread_id)
+        if not thread.IsValid():
+            return None
+
+        for i in range(thread.GetNumFrames()):
+            frame = thread.GetFrameAtIndex(i)
+            if get_frame_key(frame) == self.frame_key:
+                return frame
+
+        return None
+
+    def describe(self):
+        # type: () -> str
+        return "watch #%d `%s` (%s length=%d)" % (self.watch_id, self.expression, self.snapshot.arrow_type, self.snapshot.length)
+
+
+def get_frame_key(frame):
+    # type: (SBFrame) -> tuple
+    return frame.GetFunctionName(), frame.GetCFA()
+
+
+def find_variable(frame, expression):
+    # type: (SBFrame, str) -> SBValue
+    """Variable paths only, evaluating expressions on every stop is slow and can run code in the process"""
+    value = frame.GetValueForVariablePath(expression)
+    if not value.IsValid() or not value.GetError().Success():
+        return None
+    return value
+
+
+# watch id -> Watch
+watches = {}
+_next_watch_id = [1]
+
+# Targets that already have the stop hook reporting the changes, stop hooks belong to the target
+# so they survive relaunching the process
+_targets_with_stop_hook = []
+
+
+def install_stop_hook(debugger, exe_ctx):
+    # type: (SBDebugger, SBExecutionContext) -> None
+    target = exe_ctx.GetTarget()
+    if any(other == target for other in _targets_with_stop_hook):
+        return
+
+    # Run in the watch execution context so the hook is added to its target, not the selected one
+    hook_result = lldb.SBCommandReturnObject()
+    debugger.GetCommandInterpreter().HandleCommand('target stop-hook add -o "arrow watch --report"', exe_ctx, hook_result)
+    if not hook_result.Succeeded():
+        raise RuntimeError("Could not add the stop hook: %s" % hook_result.GetError())
+
+    _targets_with_stop_hook.append(target)
+
+
+def report_changes(process, result):
+    # type: (SBProcess, SBCommandReturnObject) -> None
+    lines = []
+
+    for watch in watches.values():
+        # When the frame returned or the value is not in scope, keep the previous snapshot
+        frame = watch.find_frame(process)
+        if frame is None:
+            continue
+
+        value = find_variable(frame, watch.expression)
+        if value is None:
+            continue
+
+        try:
+            snapshot = take_snapshot(value)
+        except Exception as e:
+            lines.append("watch #%d `%s`: error %s" % (watch.watch_id, watch.expression, e))
+            continue
+
+        old = watch.snapshot
+        watch.snapshot = snapshot
+
+        changes = diff_snapshots(old, snapshot)
+        if len(changes) == 0 and old.length == snapshot.length:
+            continue
+
+        lines.append("%s: %d changed range(s)" % (watch.describe(), len(changes)))
+        for start, end, old_values, new_values in changes:
+            lines.append("  [%d..%d): %s -> %s" % (start, end, format_values(old_values), format_values(new_values)))
+
+        if old.length != snapshot.length:
+            lines.append("  length %d -> %d" % (old.length, snapshot.length))
+            if snapshot.length > old.length:
+                lines.append("  [%d..%d): added %s" % (old.length, snapshot.length, format_values(snapshot.decode(old.length, snapshot.length))))
+
+    if lines:
+        result.AppendMessage("\n".join(lines))
+
+
+def watch_command(debugger, args, exe_ctx, result):
+    """arrow watch <variable> | --list | --delete <id> | --clear | --report
+
+    Keep a fingerprint of the array and report the changed index ranges on every stop
+    """
+    usage = "usage: arrow watch <variable> | --list | --delete <id> | --clear"
+
+    if len(args) == 0:
+        result.SetError(usage)
+        return
+
+    if args[0] == "--list":
+        result.AppendMessage("\n".join(watch.describe() for watch in watches.values()) or "No watches")
+        return
+
+    if args[0] == "--clear":
+        watches.clear()
+        return
+
+    if args[0] == "--delete":
+        if len(args) != 2 or not args[1].isdigit() or int(args[1]) not in watches:
+            result.SetError(usage)
+            return
+        del watches[int(args[1])]
+        return
+
+    if args[0] == "--report":
+        report_changes(exe_ctx.GetProcess(), result)
+        return
+
+    frame = exe_ctx.GetFrame()
+    if not frame.IsValid():
+        result.SetError("No selected frame")
+        return
+
+    expression = " ".join(args)
+    value = find_variable(frame, expression)
+    if value is None:
+        result.SetError("'%s' is not a variable path in the selected frame" % expression)
+        return
+
+    watch = Watch(_next_watch_id[0], expression, frame, take_snapshot(value))
+    _next_watch_id[0] += 1
+    watches[watch.watch_id] = watch
+
+    install_stop_hook(debugger, exe_ctx)
+    result.AppendMessage(watch.describe())
@@ -0,0 +1,538 @@
+import struct
+
+import lldb
+
+from lldb_providers import (
+    LengthSummaryProvider,
+    StopCache,
+    read_process_memory,
+    struct_format_for_type,
+)
+
+# Decoder for Rust values (mainly the recursive enums `DataType` and `ScalarValue`) from raw memory.
+#
+# Walking an enum with `GetChildMemberWithName` creates a value per field and per variant,
+# instead the debug info layout of each type is read once (per module) into a table:
+#   - for enums, discriminant -> variant with its field offsets
+#   - for structs, the field offsets
+# and then the value is decoded from a single memory read, following `Box`/`Arc` pointers with
+# another read for the pointee.
+#
+# rust-lldb encodes an enum as:
+#   union DataType {
+#     $variants$: union {
+#       $variant$<discriminant>: struct { $discr$: u8, value: struct Timestamp { __0: TimeUnit, __1: Option<Arc<str>> } }
+#       $variant$: struct { value: ... }  <- the default (dataful) variant of niche encoded enums, has no $discr$
+#       ...
+#     }
+#   }
+# types that are encoded differently are shown as opaque values.
+
+VARIANTS_FIELD = "$variants$"
+VARIANT_PREFIX = "$variant$"
+DISCRIMINANT_FIELD = "$discr$"
+VARIANT_VALUE_FIELD = "value"
+
+# Safety net for recursive types and for values that are read from garbage memory
+MAX_DECODE_DEPTH = 16
+
+# Default number of decoded elements of a Vec/slice, the rest are summarized as "... N more"
+MAX_ELEMENTS = 64
+
+# Not worth decoding, shown by their type name
+OPAQUE_TYPE_PREFIXES = (
+    "std::collections::hash::map::HashMap<",
+    "hashbrown::",
+    "core::marker::PhantomData<",
+    "arrow_array::",
+    "arrow_buffer::",
+)
+
+SMART_POINTER_PREFIXES = ("alloc::boxed::Box<", "alloc::sync::Arc<", "alloc::rc::Rc<")
+
+
+class RustEnumValue:
+    def __init__(self, variant, fields):
+        # type: (str, list) -> RustEnumValue
+        self.variant = variant
+        # list of (name, value)
+        self.fields = fields
+
+
+class RustStructValue:
+    def __init__(self, type_name, fields):
+        # type: (str, list) -> RustStructValue
+        self.type_name = type_name
+        # list of (name, value)
+        self.fields = fields
+
+    def get(self, name):
+        # type: (str) -> object
+        return next((value for field_name, value in self.fields if field_name == name), None)
+
+
+class OpaqueValue:
+    def __init__(self, description):
+        # type: (str) -> OpaqueValue
+        self.description = description
+
+    def __str__(self):
+        return self.description
+
+
+class FieldLayout:
+    def __init__(self, name, offset, field_type):
+        # type: (str, int, SBType) -> FieldLayout
+        self.name = name
+        self.offset = offset
+        self.field_type = field_type
+
+
+class VariantLayout:
+    def __init__(self, name, offset, fields):
+        # type: (str, int, list) -> VariantLayout
+        self.name = name
+        # offset of the variant value in the enum
+        self.offset = offset
+        self.fields = fields
+
+
+class EnumLayout:
+    """Discriminant -> variant table of a single enum type"""
+
+    def __init__(self, discriminant_offset, discriminant_size, variants, default_variant):
+        # type: (int, int, dict, VariantLayout) -> EnumLayout
+        self.discriminant_offset = discriminant_offset
+        self.discriminant_size = discriminant_size
+        self.variants = variants
+        self.default_variant = default_variant
+
+    def select_variant(self, discriminant):
+        # type: (int) -> VariantLayout
+        return self.variants.get(discriminant, self.default_variant)
+
+
+def type_fields(sbtype):
+    # type: (SBType) -> list
+    return [
+        FieldLayout(member.GetName(), member.GetOffsetInBytes(), member.GetType())
+        for member in (sbtype.GetFieldAtIndex(i) for i in range(sbtype.GetNumberOfFields()))
+    ]
+
+
+def build_enum_layout(sbtype):
+    # type: (SBType) -> EnumLayout
+    """Build the discriminant -> variant table from the debug info, None when not an encoded enum"""
+    fields = type_fields(sbtype)
+    if len(fields) != 1 or fields[0].name != VARIANTS_FIELD:
+        return None
+
+    variants_base = fields[0].offset
+    discriminant_offset = None
+    discriminant_size = 0
+    variants = {}
+    default_variant = None
+
+    for variant_field in type_fields(fields[0].field_type):
+        variant_members = dict((field.name, field) for field in type_fields(variant_field.field_type))
+
+        value = variant_members.get(VARIANT_VALUE_FIELD)
+        if value is None:
+            continue
+
+        variant = VariantLayout(
+            name=value.field_type.GetName().rsplit("::", 1)[-1],
+            offset=variants_base + variant_field.offset + value.offset,
+            fields=type_fields(value.field_type),
+        )
+
+        discriminant = variant_members.get(DISCRIMINANT_FIELD)
+        suffix = variant_field.name[len(VARIANT_PREFIX):]
+        if discriminant is None or not suffix.isdigit():
+            default_variant = variant
+            continue
+
+        discriminant_offset = variants_base + variant_field.offset + discriminant.offset
+        discriminant_size = discriminant.field_type.GetByteSize()
+        variants[int(suffix)] = variant
+
+    if default_variant is None and len(variants) > 0:
+        default_variant = variants[min(variants)]
+
+    return EnumLayout(discriminant_offset or 0, discriminant_size, variants, default_variant)
+
+
+def split_template_args(type_name):
+    # type: (str) -> list
+    """`Arc<[Arc<Field, Global>], Global>` -> ["[Arc<Field, Global>]", "Global"]"""
+    start = type_name.find("<")
+    if start == -1 or not type_name.endswith(">"):
+        return []
+
+    args = []
+    depth = 0
+    current = ""
+    for char in type_name[start + 1:-1]:
+        if char in "<[(":
+            depth += 1
+        elif char in ">])":
+            depth -= 1
+
+        if char == "," and depth == 0:
+            args.append(current.strip())
+            current = ""
+        else:
+            current += char
+
+    args.append(current.strip())
+    return args
+
+
+def find_pointer(fields, base=0):
+    # type: (list, int) -> tuple
+    """Depth first search for the first (thin or fat) pointer, returns (offset, type)"""
+    for field in fields:
+        field_type = field.field_type
+        if field_type.IsPointerType() or field_type.IsReferenceType():
+            return base + field.offset, field_type
+
+        nested = type_fields(field_type)
+        names = set(nested_field.name for nested_field in nested)
+        if "data_ptr" in names or "vtable" in names:
+            return base + field.offset, field_type
+
+        found = find_pointer(nested, base + field.offset)
+        if found is not None:
+            return found
+
+    return None
+
+
+class RustValueDecoder:
+    """Decode Rust values from raw memory, the layout of each type is built once"""
+
+    def __init__(self, target, max_elements=MAX_ELEMENTS):
+        # type: (SBTarget, int) -> RustValueDecoder
+        self.target = target
+        self.process = target.GetProcess()
+        self.pointer_size = self.process.GetAddressByteSize()
+        self.byte_order = "little" if self.process.GetByteOrder() == lldb.eByteOrderLittle else "big"
+        self.max_elements = max_elements
+        # Number of values cut at MAX_DECODE_DEPTH, those depend on the depth they were decoded at
+        self.depth_truncations = 0
+
+    def decode_at(self, address, sbtype, depth=0):
+        # type: (int, SBType, int) -> object
+        if address == 0:
+            return OpaqueValue("null")
+
+        key = (address, sbtype.GetName(), self.max_elements)
+        cached = _decoded_values.get(self.process, key)
+        if cached is not None:
+            return cached
+
+        depth_truncations = self.depth_truncations
+        value = self.decode(read_process_memory(self.process, address, sbtype.GetByteSize()), 0, sbtype, depth)
+        if self.depth_truncations == depth_truncations:
+            _decoded_values.set(key, value)
+
+        return value
+
+    def decode(self, data, offset, sbtype, depth):
+        # type: (bytes, int, SBType, int) -> object
+        if depth > MAX_DECODE_DEPTH:
+            self.depth_truncations += 1
+            return OpaqueValue("...")
+
+        sbtype = sbtype.GetCanonicalType()
+        type_name = sbtype.GetName()
+
+        # Before the pointers check as `Box<T>` can be a pointer type
+        if type_name.startswith(SMART_POINTER_PREFIXES):
+            return self.decode_smart_pointer(data, offset, sbtype, depth)
+
+        if sbtype.IsPointerType() or sbtype.IsReferenceType():
+            return OpaqueValue("0x%x" % self.read_pointer(data, offset))
+
+        if sbtype.GetTypeClass() == lldb.eTypeClassEnumeration:
+            # Fieldless enums (e.g. `TimeUnit`)
+            value = self.read_unsigned(data, offset, sbtype.GetByteSize())
+            return RustEnumValue(get_enumerator_names(sbtype).get(value, str(value)), [])
+
+        if sbtype.GetNumberOfFields() == 0:
+            return self.decode_primitive(data, offset, sbtype)
+
+        if type_name.startswith(OPAQUE_TYPE_PREFIXES):
+            return OpaqueValue(type_name.split("<", 1)[0].rsplit("::", 1)[-1] + " {..}")
+
+        if type_name == "alloc::string::String" or type_name == "&str":
+            return self.decode_sequence(data, offset, sbtype, depth, is_string=True)
+
+        if type_name.startswith("alloc::vec::Vec<") or type_name.startswith("&["):
+            return self.decode_sequence(data, offset, sbtype, depth, is_string=False)
+
+        enum_layout = get_enum_layout(sbtype)
+        if enum_layout is None and sbtype.GetTypeClass() == lldb.eTypeClassUnion:
+            # An enum encoding other than rust-lldb's, the members overlap so decoding them all is garbage
+            return OpaqueValue(type_name)
+
+        if enum_layout is not None:
+            discriminant = self.read_unsigned(data, offset + enum_layout.discriminant_offset, enum_layout.discriminant_size)
+            variant = enum_layout.select_variant(discriminant)
+            if variant is None:
+                return OpaqueValue(type_name)
+
+            return RustEnumValue(variant.name, [
+                (field.name, self.decode(data, offset + variant.offset + field.offset, field.field_type, depth + 1))
+                for field in variant.fields
+            ])
+
+        return RustStructValue(type_name, [
+            (field.name, self.decode(data, offset + field.offset, field.field_type, depth + 1))
+            for field in get_struct_layout(sbtype)
+        ])
+
+    def decode_primitive(self, data, offset, sbtype):
+        # type: (bytes, int, SBType) -> object
+        size = sbtype.GetByteSize()
+        if size == 0:
+            return RustStructValue(sbtype.GetName(), [])
+
+        raw = data[offset:offset + size]
+        if sbtype.GetName() == "bool":
+            return raw != b"\x00"
+
+        fmt = struct_format_for_type(sbtype)
+        if fmt is None:
+            # i128/u128
+            return int.from_bytes(raw, self.byte_order, signed=sbtype.GetTypeFlags() & lldb.eTypeIsSigned != 0)
+
+        return struct.unpack(("<" if self.byte_order == "little" else ">") + fmt, raw)[0]
+
+    def read_unsigned(self, data, offset, size):
+        # type: (bytes, int, int) -> int
+        return int.from_bytes(data[offset:offset + size], self.byte_order)
+
+    def read_pointer(self, data, offset):
+        # type: (bytes, int) -> int
+        return self.read_unsigned(data, offset, self.pointer_size)
+
+    def decode_sequence(self, data, offset, sbtype, depth, is_string):
+        # type: (bytes, int, SBType, int, bool) -> object
+        """String/&str/Vec<T>/&[T], the data pointer is the first pointer and the length is the `len`/`length` field"""
+        fields = get_struct_layout(sbtype)
+
+        # struct String { vec: Vec<u8> }
+        while len(fields) == 1 and fields[0].name not in ("len", "length"):
+            offset += fields[0].offset
+            fields = get_struct_layout(fields[0].field_type)
+
+        pointer = find_pointer(fields)
+        length_field = next((field for field in fields if field.name in ("len", "length")), None)
+        if pointer is None or length_field is None:
+            return OpaqueValue(sbtype.GetName())
+
+        pointer_offset, pointer_type = pointer
+        address = self.read_pointer(data, offset + pointer_offset)
+        length = self.read_pointer(data, offset + length_field.offset)
+
+        if is_string:
+            return read_process_memory(self.process, address, min(length, 4096)).decode("utf-8", "replace")
+
+        element_type = sbtype.GetTemplateArgumentType(0)
+        if not element_type.IsValid() or element_type.GetByteSize() == 0:
+            element_type = pointer_type.GetPointeeType()
+
+        return self.decode_elements(address, element_type, length, depth)
+
+    def decode_elements(self, address, element_type, length, depth):
+        # type: (int, SBType, int, int) -> list
+        element_size = element_type.GetByteSize()
+        count = min(length, self.max_elements)
+        data = read_process_memory(self.process, address, count * element_size)
+
+        elements = [self.decode(data, i * element_size, element_type, depth + 1) for i in range(count)]
+        if length > count:
+            elements.append(OpaqueValue("... %d more" % (length - count)))
+
+        return elements
+
+    def decode_smart_pointer(self, data, offset, sbtype, depth):
+        # type: (bytes, int, SBType, int) -> object
+        """Box<T>/Arc<T>/Rc<T> are transparent, like their Debug output"""
+        if sbtype.IsPointerType():
+            return self.decode_at(self.read_pointer(data, offset), sbtype.GetPointeeType(), depth + 1)
+
+        pointer = find_pointer(get_struct_layout(sbtype))
+        if pointer is None:
+            return OpaqueValue(sbtype.GetName())
+
+        pointer_offset, pointer_type = pointer
+        address = self.read_pointer(data, offset + pointer_offset)
+        if address == 0:
+            return OpaqueValue("null")
+
+        # ArcInner/RcBox are #[repr(C)] { strong, weak, data }
+        is_counted = not sbtype.GetName().startswith("alloc::boxed::Box<")
+        pointee_name = split_template_args(sbtype.GetName())[0]
+
+        if pointer_type.IsPointerType() or pointer_type.IsReferenceType():
+            pointee = pointer_type.GetPointeeType()
+            if not is_counted:
+                return self.decode_at(address, pointee, depth + 1)
+
+            data_field = next((field for field in get_struct_layout(pointee) if field.name in ("data", "value")), None)
+            if data_field is None:
+                return OpaqueValue(sbtype.GetName())
+
+            return self.decode_at(address + data_field.offset, data_field.field_type, depth + 1)
+
+        if pointee_name.startswith("dyn "):
+            return OpaqueValue(pointee_name)
+
+        # Fat pointer to a slice/str, e.g. Fields = Arc<[FieldRef]> and timezones Arc<str>
+        length_field = next((field for field in get_struct_layout(pointer_type) if field.name == "length"), None)
+        if length_field is None:
+            return OpaqueValue(sbtype.GetName())
+
+        length = self.read_pointer(data, offset + pointer_offset + length_field.offset)
+
+        if pointee_name == "str":
+            element_type = self.target.FindFirstType("u8")
+        else:
+            element_type = self.target.FindFirstType(pointee_name[1:-1])
+            if not element_type.IsValid():
+                return OpaqueValue(sbtype.GetName())
+
+        if is_counted:
+            align = max(element_type.GetByteSize() if element_type.GetNumberOfFields() == 0 else self.pointer_size, 1)
+            address += (2 * self.pointer_size + align - 1) // align * align
+
+        if pointee_name == "str":
+            return read_process_memory(self.process, address, min(length, 4096)).decode("utf-8", "replace")
+
+        return self.decode_elements(address, element_type, length, depth)
+
+
+def module_key(sbtype):
+    # type: (SBType) -> str
+    get_module = getattr(sbtype, "GetModule", None)
+    if get_module is None:
+        return ""
+    return get_module().GetUUIDString() or ""
+
+
+# (module, type name) -> EnumLayout (or None when the type is not an enum)
+_enum_layouts = {}
+
+# (module, type name) -> list of FieldLayout
+_struct_layouts = {}
+
+# (module, type name) -> {value: enumerator name}
+_enumerator_names = {}
+
+# (address, type name, max elements) -> decoded value
+_decoded_values = StopCache()
+
+
+def get_enum_layout(sbtype):
+    # type: (SBType) -> EnumLayout
+    key = (module_key(sbtype), sbtype.GetName())
+    if key not in _enum_layouts:
+        _enum_layouts[key] = build_enum_layout(sbtype)
+    return _enum_layouts[key]
+
+
+def get_struct_layout(sbtype):
+    # type: (SBType) -> list
+    key = (module_key(sbtype), sbtype.GetName())
+    if key not in _struct_layouts:
+        _struct_layouts[key] = type_fields(sbtype)
+    return _struct_layouts[key]
+
+
+def get_enumerator_names(sbtype):
+    # type: (SBType) -> dict
+    key = (module_key(sbtype), sbtype.GetName())
+    if key not in _enumerator_names:
+        members = sbtype.GetEnumMembers()
+        _enumerator_names[key] = dict(
+            (member.GetValueAsUnsigned(), member.GetName().rsplit("::", 1)[-1])
+            for member in (members.GetTypeEnumMemberAtIndex(i) for i in range(members.GetSize()))
+        )
+    return _enumerator_names[key]
+
+
+def format_rust_value(value):
+    # type: (object) -> str
+    """Format a decoded value like its Rust Debug output"""
+    if isinstance(value, OpaqueValue):
+        return value.description
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, str):
+        return '"%s"' % value
+    if isinstance(value, list):
+        return "[" + ", ".join(format_rust_value(item) for item in value) + "]"
+    if isinstance(value, RustEnumValue):
+        return format_fields(value.variant, value.fields)
+    if isinstance(value, RustStructValue):
+        return format_fields(value.type_name.split("<", 1)[0].rsplit("::", 1)[-1], value.fields)
+
+    return str(value)
+
+
+def format_fields(name, fields):
+    # type: (str, list) -> str
+    if len(fields) == 0:
+        return name
+
+    # Tuple variants/structs fields are named __0, __1, ...
+    if all(field_name.startswith("__") for field_name, _ in fields):
+        return "%s(%s)" % (name, ", ".join(format_rust_value(field) for _, field in fields))
+
+    return "%s { %s }" % (name, ", ".join("%s: %s" % (field_name, format_rust_value(field)) for field_name, field in fields))
+
+
+def decode_value(valobj, max_elements=MAX_ELEMENTS):
+    # type: (SBValue, int) -> object
+    valobj = valobj.GetNonSyntheticValue()
+    while valobj.GetType().IsPointerType() or valobj.GetType().IsReferenceType():
+        valobj = valobj.Dereference()
+
+    address = valobj.GetLoadAddress()
+    if address == lldb.LLDB_INVALID_ADDRESS:
+        raise RuntimeError("%s is not in memory" % valobj.GetName())
+
+    return RustValueDecoder(valobj.GetTarget(), max_elements).decode_at(address, valobj.GetType())
+
+
+def RustValueSummaryProvider(valobj, dict):
+    # type: (SBValue, dict) -> str
+    """Summary for `DataType`, `Field` and `ScalarValue`"""
+    try:
+        value = decode_value(valobj)
+    except Exception as e:
+        return "<%s>" % e
+
+    # The layout is not supported, no summary rather than a misleading one
+    if isinstance(value, OpaqueValue):
+        return ""
+
+    return format_rust_value(value)
+
+
+def ArrowArraySummaryProvider(valobj, dict):
+    # type: (SBValue, dict) -> str
+    """Length summary, with the logical type when it has parameters (e.g. timezone or decimal scale)"""
+    summary = LengthSummaryProvider(valobj, dict)
+
+    try:
+        data_type = decode_value(valobj.GetNonSyntheticValue().GetChildMemberWithName("data_type"))
+    except Exception:
+        return summary
+
+    if isinstance(data_type, RustEnumValue) and len(data_type.fields) > 0:
+        summary += " data_type=" + format_rust_value(data_type)
+
+    return summary
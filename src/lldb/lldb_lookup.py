@@ -14,16 +14,25 @@ def import_file(relative_file_path, module_name):
 
 import_file("lldb_providers.py", "lldb_providers")
 import_file("arrow_types.py", "arrow_types")
+import_file("arrow_memory.py", "arrow_memory")
+import_file("arrow_watch.py", "arrow_watch")
+import_file("arrow_ffi.py", "arrow_ffi")
+import_file("enum_layouts.py", "enum_layouts")
+import_file("arrow_table.py", "arrow_table")
+import_file("arrow_commands.py", "arrow_commands")
 
 from lldb_providers import *
 from arrow_types import ArrowType, classify_struct, classify_union
+from arrow_commands import arrow_command
+from arrow_ffi import FFIArrowSchemaSummaryProvider
+from enum_layouts import ArrowArraySummaryProvider, RustValueSummaryProvider
 
 def classify_arrow_type(type):
     type_class = type.GetTypeClass()
     if type_class == lldb.eTypeClassStruct:
         return classify_struct(type.name, type.fields)
     if type_class == lldb.eTypeClassUnion:
-        return classify_union(type.fields)
+        return classify_union(type.name, type.fields)
 
     return ArrowType.UNKNOWN
 
@@ -38,7 +47,7 @@ def summary_lookup(valobj, dict):
     arrow_type = classify_arrow_type(unwrap_pointers(valobj).GetType())
 
     if arrow_type == ArrowType.PRIMITIVE_ARRAY:
-        return LengthSummaryProvider(valobj, dict)
+        return ArrowArraySummaryProvider(valobj, dict)
 
     if arrow_type == ArrowType.BOOLEAN_BUFFER:
         return LengthSummaryProvider(valobj, dict)
@@ -49,6 +58,12 @@ def summary_lookup(valobj, dict):
     if arrow_type == ArrowType.OFFSET_BUFFER:
         return LengthSummaryProvider(valobj, dict)
 
+    if arrow_type == ArrowType.FFI_ARROW_SCHEMA:
+        return FFIArrowSchemaSummaryProvider(valobj, dict)
+
+    if arrow_type in (ArrowType.DATA_TYPE, ArrowType.FIELD, ArrowType.SCALAR_VALUE):
+        return RustValueSummaryProvider(valobj, dict)
+
     return ""
 
 
@@ -104,10 +119,21 @@ def __lldb_init_module(debugger, internal_dict):
         'type synthetic add -l lldb_lookup.synthetic_lookup -x "^&*(arrow_buffer::([a-z_]+::)+)OffsetBuffer<.+>$" --category ArrowRs',
         'type summary add -F lldb_lookup.summary_lookup  -e -x -h "^&*(arrow_buffer::([a-z_]+::)+)OffsetBuffer<.+>$" --category ArrowRs',
 
+        # FFI_ArrowSchema (summary only, the children are the raw C struct fields)
+        'type summary add -F lldb_lookup.summary_lookup  -e -x "^&*(arrow_schema::([a-z_]+::)+)FFI_ArrowSchema$" --category ArrowRs',
+
+        # DataType, Field and ScalarValue (summary only)
+        'type summary add -F lldb_lookup.summary_lookup  -e -x "^&*(arrow_schema::([a-z_]+::)+)DataType$" --category ArrowRs',
+        'type summary add -F lldb_lookup.summary_lookup  -e -x "^&*(arrow_schema::([a-z_]+::)+)Field$" --category ArrowRs',
+        'type summary add -F lldb_lookup.summary_lookup  -e -x "^&*(datafusion_common::([a-z_]+::)+)ScalarValue$" --category ArrowRs',
+
         # Add here before this
         # also need to add in classify_struct
 
-        'type category enable ArrowRs'
+        'type category enable ArrowRs',
+
+        # Commands
+        'command script add -f lldb_lookup.arrow_command arrow',
 
     ]
 
@@ -1,3 +1,5 @@
+import re
+import struct
 import sys
 
 import lldb
@@ -126,20 +128,25 @@ def LengthSummaryProvider(valobj, dict):
 def string_data_slice(value, data_ptr, start_offset, end_offset):
     # type: (SBValue, SBValue, int, int) -> str
 
-    u8_type = get_type_by_name(value, "u8")
     length = end_offset - start_offset
     if length == 0:
         return '""'
 
-    string_data = ""
-    for i in range(start_offset, end_offset):
-        byte = data_ptr.CreateValueFromAddress(
-            "[%s]" % i, data_ptr.GetValueAsUnsigned() + i, u8_type
-        ).GetValueAsUnsigned()
-
-        string_data += chr(byte)
+    # Single read for the whole string rather than a value per byte
+    try:
+        string_data = read_process_memory(value.GetProcess(), data_ptr.GetValueAsUnsigned() + start_offset, length)
+    except RuntimeError:
+        # Same as reading through values, unreadable bytes are 0
+        u8_type = get_type_by_name(value, "u8")
+        string_data = bytes(
+            data_ptr.CreateValueFromAddress(
+                "[%s]" % i, data_ptr.GetValueAsUnsigned() + i, u8_type
+            ).GetValueAsUnsigned() & 0xFF
+            for i in range(start_offset, end_offset)
+        )
 
-    return string_data
+    # Same decoding as `read_string_values` so `p` and `arrow table` show the same text
+    return string_data.decode("utf-8", "replace")
 
 
 def is_bit_on(n, bit):
@@ -177,6 +184,332 @@ def create_option_none(value: lldb.SBValue, option_type: str):
 def create_option_some(value: lldb.SBValue, option_type: str):
     return get_type_by_name(value, f"core::option::Option<{option_type}>::Some")
 
+
+def read_process_memory(process, address, size):
+    # type: (SBProcess, int, int) -> bytes
+    """Read `size` bytes in a single call instead of creating a value per element"""
+    if size == 0:
+        return b""
+
+    error = lldb.SBError()
+    data = process.ReadMemory(address, size, error)
+    if not error.Success() or data is None:
+        raise RuntimeError("Failed to read %d bytes at 0x%x: %s" % (size, address, error.GetCString()))
+
+    return data
+
+
+def read_usize(process, address):
+    # type: (SBProcess, int) -> int
+    pointer_size = process.GetAddressByteSize()
+    byte_order = "little" if process.GetByteOrder() == lldb.eByteOrderLittle else "big"
+    return int.from_bytes(read_process_memory(process, address, pointer_size), byte_order)
+
+
+def find_value(frame, expression):
+    # type: (SBFrame, str) -> SBValue
+    """Find a value by variable path (e.g. `batch.columns`), falling back to expression evaluation"""
+    value = frame.GetValueForVariablePath(expression)
+    if value.IsValid() and value.GetError().Success():
+        return value
+
+    value = frame.EvaluateExpression(expression)
+    if not value.IsValid() or not value.GetError().Success():
+        raise RuntimeError("Could not evaluate '%s': %s" % (expression, value.GetError().GetCString()))
+
+    return value
+
+
+class StopCache:
+    """Cache of decoded values, cleared once the process resumes as the memory can change
+
+    The stop ID restarts with every process, so the process is part of the key: a relaunched
+    process can reach the same stop ID with the same addresses (ASLR is disabled by default)
+    """
+
+    def __init__(self):
+        self.stop = None
+        self.values = {}
+
+    def get(self, process, key):
+        # type: (SBProcess, object) -> object
+        stop = (process.GetUniqueID(), process.GetStopID())
+        if stop != self.stop:
+            self.stop = stop
+            self.values.clear()
+
+        return self.values.get(key)
+
+    def set(self, key, value):
+        # type: (object, object) -> None
+        self.values[key] = value
+
+
+def parse_row_range(text, length):
+    # type: (str, int) -> tuple
+    """Parse `a..b` (either side can be omitted) into a [start, end) range clamped to `length`"""
+    start, separator, end = text.partition("..")
+    if separator == "" or not (start == "" or start.isdigit()) or not (end == "" or end.isdigit()):
+        raise ValueError("Invalid range '%s', expected a..b" % text)
+
+    start = min(int(start) if start else 0, length)
+    end = min(int(end) if end else length, length)
+
+    return start, max(start, end)
+
+
+def format_arrow_value(value):
+    # type: (object) -> str
+    """Format a decoded value (from the bulk readers) the way the synthetic providers show it"""
+    if value is None:
+        return "None"
+    if isinstance(value, str):
+        return '"%s"' % value
+    if isinstance(value, bytes):
+        return "0x" + value.hex()
+    if isinstance(value, list):
+        return "[" + ", ".join(format_arrow_value(item) for item in value) + "]"
+    if isinstance(value, dict):
+        return "{" + ", ".join("%s: %s" % (key, format_arrow_value(item)) for key, item in value.items()) + "}"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+
+    return str(value)
+
+
+def select_enum_variant(enum):
+    # type: (SBValue) -> SBValue
+    """Returns the value of the active variant of a Rust enum
+
+    When using rust-lldb the enum is encoded as a union with a single `$variants$` field,
+    each `$variant$<discriminant>` field holds the `$discr$` and the variant `value`
+    (the one without a discriminant value is the default variant).
+
+    RustRover LLDB already shows only the active variant, so the enum is returned as is.
+    """
+    all_variants = enum.GetChildMemberWithName("$variants$")
+    if not all_variants.IsValid():
+        return enum
+
+    default_variant = None
+    for i in range(all_variants.GetNumChildren()):
+        variant = all_variants.GetChildAtIndex(i)
+        discr = variant.GetChildMemberWithName("$discr$")
+        if not discr.IsValid():
+            default_variant = variant
+            continue
+
+        if variant.GetName() == "$variant$%d" % discr.GetValueAsUnsigned():
+            return variant.GetChildMemberWithName("value")
+
+    if default_variant is None:
+        return enum
+
+    return default_variant.GetChildMemberWithName("value")
+
+
+def struct_format_for_type(element_type):
+    # type: (SBType) -> str
+    """Returns the `struct` module format of a primitive type, or None when it can't be bulk decoded (e.g. i128)"""
+    size = element_type.GetByteSize()
+    flags = element_type.GetTypeFlags()
+
+    if flags & lldb.eTypeIsFloat:
+        return {2: "e", 4: "f", 8: "d"}.get(size)
+
+    fmt = {1: "b", 2: "h", 4: "i", 8: "q"}.get(size)
+    if fmt is None:
+        return None
+
+    return fmt if flags & lldb.eTypeIsSigned else fmt.upper()
+
+
+def unpack_values(process, fmt, data):
+    # type: (SBProcess, str, bytes) -> list
+    byte_order = "<" if process.GetByteOrder() == lldb.eByteOrderLittle else ">"
+    return list(struct.unpack("%s%d%s" % (byte_order, len(data) // struct.calcsize(fmt), fmt), data))
+
+
+def read_bitmap(process, address, bit_offset, length):
+    # type: (SBProcess, int, int, int) -> int
+    """Read `length` bits starting at `bit_offset` with a single memory read
+
+    Returns the bits as an int where bit `i` is the value at index `i` (arrow bitmaps are LSB first)
+    """
+    if length == 0:
+        return 0
+
+    first_byte = bit_offset // 8
+    end_byte = (bit_offset + length + 7) // 8
+    data = read_process_memory(process, address + first_byte, end_byte - first_byte)
+
+    return (int.from_bytes(data, "little") >> (bit_offset % 8)) & ((1 << length) - 1)
+
+
+def bitmap_to_list(bits, length):
+    # type: (int, int) -> list
+    return [(bits >> i) & 1 == 1 for i in range(length)]
+
+
+def read_byte_values(process, offsets_address, offset_fmt, data_address, start, end):
+    # type: (SBProcess, int, str, int, int, int) -> list
+    """Read the values in [start, end) of a variable length binary layout (offsets + data)
+
+    The offsets and then the data of the whole range are each read with a single memory read
+    """
+    if start == end:
+        return []
+
+    offset_size = struct.calcsize(offset_fmt)
+    offsets = unpack_values(
+        process, offset_fmt, read_process_memory(process, offsets_address + start * offset_size, (end - start + 1) * offset_size)
+    )
+    data = read_process_memory(process, data_address + offsets[0], offsets[-1] - offsets[0])
+
+    return [data[offsets[i] - offsets[0]:offsets[i + 1] - offsets[0]] for i in range(end - start)]
+
+
+def read_string_values(process, offsets_address, offset_fmt, data_address, start, end):
+    # type: (SBProcess, int, str, int, int, int) -> list
+    return [value.decode("utf-8", "replace") for value in read_byte_values(process, offsets_address, offset_fmt, data_address, start, end)]
+
+
+# `<arrow_array::array::primitive_array::PrimitiveArray<...> as arrow_array::array::Array>::{vtable}`
+ARRAY_VTABLE_NAME_REGEX = re.compile(r'name = "<(.+) as ([a-z_]+::)+Array>::\{vtable\}"')
+
+# (module UUID, vtable file address) -> concrete type name
+# Keyed by module so a rebuilt binary (same load addresses when ASLR is disabled) is looked up again
+_vtable_type_names = {}
+
+# (module UUID, vtable file address) of the vtables without debug info, only remembered for the current stop
+_unknown_vtables = StopCache()
+
+
+def resolve_vtable_type_name(target, vtable_address):
+    # type: (SBTarget, int) -> str
+    """Find the concrete type behind a `dyn Array` vtable
+
+    The vtable symbol itself is anonymous, but rustc emits a debug info variable named
+    `<ConcreteType as Trait>::{vtable}` for it, so we look it up once per vtable.
+    Returns None when the vtable has no debug info.
+    """
+    address = target.ResolveLoadAddress(vtable_address)
+    module = address.GetModule()
+    if not module.IsValid():
+        return None
+
+    key = (module.GetUUIDString() or module.GetFileSpec().fullpath, address.GetFileAddress())
+    if key in _vtable_type_names:
+        return _vtable_type_names[key]
+    if _unknown_vtables.get(target.GetProcess(), key):
+        return None
+
+    result = lldb.SBCommandReturnObject()
+    target.GetDebugger().GetCommandInterpreter().HandleCommand(
+        "image lookup -v -a 0x%x" % vtable_address, result
+    )
+
+    match = ARRAY_VTABLE_NAME_REGEX.search(result.GetOutput() or "")
+    if match is None:
+        _unknown_vtables.set(key, True)
+        return None
+
+    _vtable_type_names[key] = match.group(1)
+
+    return match.group(1)
+
+
+def find_trait_object_pointer(valobj, depth=4):
+    # type: (SBValue, int) -> tuple
+    """Find the (data pointer, vtable pointer) pair of a fat pointer nested in `valobj`"""
+    vtable = valobj.GetChildMemberWithName("vtable")
+    if vtable.IsValid():
+        return valobj.GetChildMemberWithName("pointer").GetValueAsUnsigned(), vtable.GetValueAsUnsigned()
+
+    if depth == 0:
+        return None
+
+    for i in range(valobj.GetNumChildren()):
+        found = find_trait_object_pointer(valobj.GetChildAtIndex(i), depth - 1)
+        if found is not None:
+            return found
+
+    return None
+
+
+def find_first_pointer(valobj, depth=4):
+    # type: (SBValue, int) -> SBValue
+    """Find the first (thin) pointer nested in `valobj`, e.g. the data pointer of a `RawVec`"""
+    if valobj.GetType().IsPointerType():
+        return valobj
+
+    if depth == 0:
+        return None
+
+    for i in range(valobj.GetNumChildren()):
+        found = find_first_pointer(valobj.GetChildAtIndex(i), depth - 1)
+        if found is not None:
+            return found
+
+    return None
+
+
+def read_vec_elements(vec):
+    # type: (SBValue) -> list
+    """The elements of a `Vec<T>` read from its raw fields, so it doesn't need the std synthetic provider
+
+    struct Vec<T> { buf: RawVec<T>, len: usize }, the data pointer is the first pointer of `buf`
+    (typed `*u8` in recent std, so the element type comes from the template argument)
+    """
+    vec = vec.GetNonSyntheticValue()
+    element_type = vec.GetType().GetTemplateArgumentType(0)
+    data_ptr = find_first_pointer(vec.GetChildMemberWithName("buf"))
+    length = vec.GetChildMemberWithName("len")
+    if not element_type.IsValid() or element_type.GetByteSize() == 0 or data_ptr is None or not length.IsValid():
+        raise RuntimeError("Unsupported Vec layout: %s" % vec.GetType().GetName())
+
+    address = data_ptr.GetValueAsUnsigned()
+    size = element_type.GetByteSize()
+
+    return [
+        vec.CreateValueFromAddress("[%d]" % i, address + i * size, element_type)
+        for i in range(length.GetValueAsUnsigned())
+    ]
+
+
+def resolve_array_ref(valobj):
+    # type: (SBValue) -> SBValue
+    """Resolve `Arc<dyn Array>` (`ArrayRef`) to a value of the concrete array type
+
+    Returns None when the concrete type can't be found
+    """
+    fat_pointer = find_trait_object_pointer(valobj.GetNonSyntheticValue())
+    if fat_pointer is None:
+        return None
+
+    arc_inner_address, vtable_address = fat_pointer
+    if arc_inner_address == 0 or vtable_address == 0:
+        return None
+
+    target = valobj.GetTarget()
+    type_name = resolve_vtable_type_name(target, vtable_address)
+    if type_name is None:
+        return None
+
+    array_type = target.FindFirstType(type_name)
+    if not array_type.IsValid():
+        return None
+
+    # vtable layout: [drop_in_place, size, align, ...methods]
+    # ArcInner is #[repr(C)] { strong, weak, data } so data is after the counters, aligned to T
+    process = valobj.GetProcess()
+    pointer_size = process.GetAddressByteSize()
+    align = max(read_usize(process, vtable_address + 2 * pointer_size), 1)
+    data_offset = (2 * pointer_size + align - 1) // align * align
+
+    return valobj.CreateValueFromAddress(valobj.GetName(), arc_inner_address + data_offset, array_type)
+
+
 class ScalarBufferParser:
     def __init__(self, valobj, element_type):
         # type: (SBValue) -> ScalarBufferParser
@@ -202,6 +535,28 @@ class ScalarBufferParser:
     def get_length(self):
         return self.length
 
+    def read_bytes(self, start, end):
+        # type: (int, int) -> bytes
+        """Read the raw bytes of the elements in [start, end) with a single memory read"""
+        return read_process_memory(
+            self.valobj.GetProcess(),
+            self.data_ptr.GetValueAsUnsigned() + start * self.element_type_size,
+            (end - start) * self.element_type_size,
+        )
+
+    def get_struct_format(self):
+        # type: () -> str
+        return struct_format_for_type(self.element_type)
+
+    def read_values(self, start, end):
+        # type: (int, int) -> list
+        """Decode the elements in [start, end), falls back to reading each element when the type can't be bulk decoded"""
+        fmt = self.get_struct_format()
+        if fmt is None:
+            return [self.get_value_at_index(i).GetValue() for i in range(start, end)]
+
+        return unpack_values(self.valobj.GetProcess(), fmt, self.read_bytes(start, end))
+
 class OffsetBufferParser:
     def __init__(self, valobj, element_type = None):
         # type: (SBValue) -> OffsetBufferParser
@@ -220,6 +575,10 @@ class OffsetBufferParser:
     def get_length(self):
         return self.parser.get_length()
 
+    def read_values(self, start, end):
+        # type: (int, int) -> list
+        return self.parser.read_values(start, end)
+
 
 # Parse BooleanBuffer
 class BooleanBufferParser:
@@ -254,6 +613,15 @@ class BooleanBufferParser:
 
         return is_bit_on(element, bit_relative_position % 8)
 
+    def read_bitmap(self, start, end):
+        # type: (int, int) -> int
+        """Read the bits in [start, end) with a single memory read, bit `i` of the result is the value at `start + i`"""
+        return read_bitmap(self.valobj.GetProcess(), self.data_ptr.GetValueAsUnsigned(), self.offset + start, end - start)
+
+    def read_values(self, start, end):
+        # type: (int, int) -> list
+        return bitmap_to_list(self.read_bitmap(start, end), end - start)
+
 
 class NullBufferParser:
     valueobj: lldb.SBValue
@@ -306,6 +674,14 @@ class NullBufferParser:
 
         return not self.boolean_buffer_parser.get_value_at_index(index)
 
+    def read_validity(self, start, end):
+        # type: (int, int) -> int
+        """Returns the validity bitmap of [start, end) (bit `i` is set when `start + i` is valid) or None when there are no nulls"""
+        if not self._has_nulls:
+            return None
+
+        return self.boolean_buffer_parser.read_bitmap(start, end)
+
 
 class ArrowBooleanBufferSyntheticProvider:
     """Pretty-printer for arrow_buffer::buffer::boolean::BooleanBuffer